@@ -1,15 +1,86 @@
 from typing import Dict, List, Tuple, Optional
+from collections import Counter
 from dataclasses import dataclass
 import yaml
+import asyncio
+import hashlib
 import logging
 import time
-from ..models import LLMEnsemble
+from ..models.ensemble import LLMEnsemble, ModelPrediction
+from ..utils.caching import canonical_hash, set_cached
 from ..utils.metrics import calculate_confidence
 from ..utils.exceptions import ValidationError, ModelError
 
 logger = logging.getLogger(__name__)
+_logging_configured = False
 
-@dataclass
+# Prefer the libyaml-backed loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Warm the loader at import rather than on the first validation request.
+# The document must exercise the mapping, sequence and scalar resolvers and
+# constructors; an empty document never reaches them.
+_WARMUP_DOCUMENT = """
+apiVersion: v1
+kind: Pod
+metadata:
+  name: warmup
+spec:
+  containers:
+  - name: app
+    image: nginx:1.25
+    ports:
+    - containerPort: 8080
+    securityContext:
+      privileged: false
+      runAsUser: 1000
+    resources:
+      limits:
+        cpu: 0.5
+        memory: null
+"""
+yaml.load(_WARMUP_DOCUMENT, Loader=_YAML_LOADER)
+
+# How long ensemble predictions stay cached, under every key they are stored
+_PREDICTION_TTL_SECONDS = 3600
+
+# Server-populated fields that never change a security verdict
+_IMMATERIAL_FIELDS = frozenset({
+    ("metadata", "creationTimestamp"),
+    ("metadata", "generation"),
+    ("metadata", "managedFields"),
+    ("metadata", "resourceVersion"),
+    ("metadata", "selfLink"),
+    ("metadata", "uid"),
+    ("metadata", "annotations", "kubectl.kubernetes.io/last-applied-configuration"),
+    ("status",),
+})
+
+def configure_logging(log_config: Dict):
+    """
+    Configure package logging once per process; later calls are no-ops.
+    
+    Sets the package logger's level and, only when the application has not
+    configured the root logger, attaches a stream handler. Records still
+    propagate, so application handlers and test log capture receive them.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+    
+    package_logger = logging.getLogger(__name__.partition(".")[0])
+    package_logger.setLevel(log_config.get("level", "INFO"))
+    if logging.getLogger().handlers:
+        return
+    
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(
+        log_config.get("format", '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    ))
+    package_logger.addHandler(handler)
+
+@dataclass(frozen=True, slots=True)
 class ValidationResult:
     verdict: str
     confidence: float
@@ -17,7 +88,8 @@ class ValidationResult:
     remediation: List[str]
     latency_ms: int
     model_agreement: float
-    raw_predictions: List[Dict]
+    quorum_reached: bool
+    raw_predictions: List[ModelPrediction]
 
 class SecurityValidator:
     """
@@ -34,27 +106,39 @@ class SecurityValidator:
         """Initialize validator with configuration."""
         try:
             with open(config_path) as f:
-                self.config = yaml.safe_load(f)
+                self.config = yaml.load(f, Loader=_YAML_LOADER)
             self.ensemble = LLMEnsemble(self.config["models"])
             self.confidence_threshold = self.config.get("confidence_threshold", 0.8)
             self.max_latency = self.config.get("max_latency_ms", 3500)
-            self._setup_logging()
+            configure_logging(self.config.get("logging", {}))
         except Exception as e:
             logger.error(f"Failed to initialize validator: {str(e)}")
             raise
 
-    def _setup_logging(self):
-        """Configure logging with appropriate handlers and formatters."""
-        log_config = self.config.get("logging", {})
-        logging.basicConfig(
-            level=log_config.get("level", "INFO"),
-            format=log_config.get("format", '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        )
-
     def validate_config(self, yaml_content: str) -> ValidationResult:
         """
         Validate configuration using LLM ensemble.
         
+        Synchronous entry point that drives ``validate_config_async`` on a
+        fresh event loop; async callers should await that method directly.
+        
+        Args:
+            yaml_content: YAML configuration to validate
+            
+        Returns:
+            ValidationResult containing verdict, confidence, violations, etc.
+            
+        Raises:
+            ValidationError: If validation fails
+            ModelError: If LLM ensemble fails
+            yaml.YAMLError: If YAML parsing fails
+        """
+        return asyncio.run(self.validate_config_async(yaml_content))
+
+    async def validate_config_async(self, yaml_content: str) -> ValidationResult:
+        """
+        Validate configuration using LLM ensemble.
+        
         Args:
             yaml_content: YAML configuration to validate
             
@@ -66,35 +150,58 @@ class SecurityValidator:
             ModelError: If LLM ensemble fails
             yaml.YAMLError: If YAML parsing fails
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         try:
-            # Parse YAML
-            config = yaml.safe_load(yaml_content)
+            # Key the cache on the raw YAML so cache hits skip parsing entirely
+            cache_key = hashlib.blake2b(
+                yaml_content.encode(), digest_size=16
+            ).hexdigest()
+            predictions = self.ensemble.get_cached(cache_key)
             
-            # Get ensemble predictions
-            predictions = self.ensemble.predict(config)
+            if predictions is None:
+                # Parse YAML
+                config = yaml.load(yaml_content, Loader=_YAML_LOADER)
+                
+                # Fall back to a content-based key so formatting changes and
+                # server-populated fields still hit the cache
+                semantic_key = canonical_hash(config, _IMMATERIAL_FIELDS)
+                predictions = self.ensemble.get_cached(semantic_key)
+                
+                if predictions is None:
+                    # Get ensemble predictions
+                    predictions = await self.ensemble.predict_cached(
+                        semantic_key, config,
+                        ttl_seconds=_PREDICTION_TTL_SECONDS, aliases=(cache_key,)
+                    )
+                else:
+                    # Remember this exact text so its next request skips parsing
+                    set_cached(cache_key, predictions, _PREDICTION_TTL_SECONDS)
             
             # Calculate confidence and agreement
             verdict, confidence = calculate_confidence(predictions)
             model_agreement = self._calculate_agreement(predictions)
+            quorum_reached = self._quorum_reached(predictions)
             
             # Performance check
-            latency = int((time.time() - start_time) * 1000)
+            latency = (time.perf_counter_ns() - start_ns) // 1_000_000
             if latency > self.max_latency:
                 logger.warning(f"Validation exceeded latency threshold: {latency}ms")
             
             # Get violations and remediation
             violations = self._extract_violations(predictions)
-            remediation = self._generate_remediation(violations)
+            remediation = await self._generate_remediation(violations)
             
+            # Predictions and remediation are shared cache entries, so each
+            # result gets its own lists
             return ValidationResult(
                 verdict=verdict,
                 confidence=confidence,
                 violations=violations,
-                remediation=remediation,
+                remediation=list(remediation),
                 latency_ms=latency,
                 model_agreement=model_agreement,
-                raw_predictions=predictions
+                quorum_reached=quorum_reached,
+                raw_predictions=list(predictions)
             )
             
         except yaml.YAMLError as e:
@@ -104,22 +211,36 @@ class SecurityValidator:
             logger.error(f"Validation failed: {str(e)}")
             raise ValidationError(str(e))
 
-    def _extract_violations(self, predictions: List[Dict]) -> List[str]:
+    def _extract_violations(self, predictions: List[ModelPrediction]) -> List[str]:
         """Extract security violations from model predictions."""
-        violations = set()
-        for pred in predictions:
-            if pred.get("violations"):
-                violations.update(pred["violations"])
-        return sorted(list(violations))
+        # Insertion-ordered dedup; sorted so the output is stable however
+        # the ensemble's predictions happened to arrive
+        violations = dict.fromkeys(
+            v for pred in predictions for v in pred.violations or ()
+        )
+        return sorted(violations)
         
-    def _generate_remediation(self, violations: List[str]) -> List[str]:
+    async def _generate_remediation(self, violations: List[str]) -> List[str]:
         """Generate remediation steps for identified violations."""
-        return self.ensemble.generate_remediation(violations)
+        return await self.ensemble.generate_remediation(tuple(violations))
 
-    def _calculate_agreement(self, predictions: List[Dict]) -> float:
-        """Calculate agreement score between ensemble models."""
+    def _calculate_agreement(self, predictions: List[ModelPrediction]) -> float:
+        """
+        Calculate agreement score between ensemble models.
+        
+        Measured over the models that responded; ones cancelled after an
+        early majority or that failed abstain (see ``_quorum_reached``).
+        """
         if not predictions:
             return 0.0
-        verdicts = [p.get("verdict") for p in predictions]
-        majority = max(set(verdicts), key=verdicts.count)
-        return verdicts.count(majority) / len(verdicts)
\ No newline at end of file
+        counts = Counter(p.verdict for p in predictions)
+        _, majority_count = counts.most_common(1)[0]
+        return majority_count / len(predictions)
+
+    def _quorum_reached(self, predictions: List[ModelPrediction]) -> bool:
+        """Check whether a strict majority of the whole ensemble shares the verdict."""
+        if not predictions:
+            return False
+        counts = Counter(p.verdict for p in predictions)
+        _, majority_count = counts.most_common(1)[0]
+        return majority_count > len(self.ensemble.models) // 2
\ No newline at end of file
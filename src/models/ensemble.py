@@ -1,17 +1,18 @@
-from typing import Dict, List, Optional, Type
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Type, Union
 import asyncio
 import time
+from collections import Counter, deque
+from contextlib import aclosing
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from ..utils.exceptions import ModelError, ModelTimeoutError
-from ..utils.caching import cache_result
+from ..utils.caching import AsyncBatcher, cache_result, get_cached, set_cached
 from ..utils.metrics import ValidationVerdict
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class ModelPrediction:
     """Structured prediction from a single model."""
     verdict: ValidationVerdict
@@ -34,6 +35,18 @@ class BaseModel(ABC):
         """Generate prediction for given configuration."""
         pass
 
+    async def predict_batch(self, configs: List[Dict]) -> List[ModelPrediction]:
+        """
+        Generate predictions for several configurations.
+
+        Models with a native batch API should override this; the default
+        fans out to ``predict``. Failed items are returned as exceptions.
+        """
+        return await asyncio.gather(
+            *(self.predict(config) for config in configs),
+            return_exceptions=True
+        )
+
     @abstractmethod
     async def generate_remediation(self, violations: List[str]) -> List[str]:
         """Generate remediation steps for violations."""
@@ -56,6 +69,13 @@ class ModelRegistry:
             raise ValueError(f"Unknown model type: {name}")
         return cls._models[name]
 
+async def _settle(task: asyncio.Task):
+    """Await a task, returning its exception instead of raising it."""
+    try:
+        return await task
+    except Exception as e:
+        return e
+
 class LLMEnsemble:
     """Ensemble of LLM models for security validation."""
     
@@ -71,46 +91,191 @@ class LLMEnsemble:
             
         if not self.models:
             raise ValueError("No models configured for ensemble")
+        
+        # Coalesce concurrent predict calls into per-model batches
+        self._batchers: List[AsyncBatcher] = [
+            AsyncBatcher(
+                model.predict_batch,
+                max_batch=config.get("batch_max_size", 32),
+                max_wait_ms=config.get("batch_max_wait_ms", 20)
+            )
+            for model in self.models
+        ]
 
-    @cache_result(ttl_seconds=3600)
-    async def predict(self, config: Dict) -> List[ModelPrediction]:
-        """Generate predictions from all models in parallel."""
-        start_time = time.time()
+    async def close(self):
+        """Stop the per-model batchers and cancel any model calls in flight."""
+        await asyncio.gather(*(batcher.close() for batcher in self._batchers))
+
+    def get_cached(self, key: str) -> Optional[List[ModelPrediction]]:
+        """Look up predictions previously stored under a caller-supplied key."""
+        return get_cached(key)
+
+    async def predict_cached(self, key: str, config: Dict,
+                             ttl_seconds: int = 3600,
+                             aliases: Sequence[str] = ()) -> List[ModelPrediction]:
+        """
+        Generate predictions and cache them under a caller-supplied key.
+
+        Lets callers key the cache on the raw input (e.g. a hash of the YAML
+        text) so a cache hit needs neither parsing nor argument serialization.
+        The result is also stored under each of ``aliases``.
+        """
+        cached = get_cached(key)
+        if cached is not None:
+            logger.debug("Cache hit for predict_cached")
+            return cached
+
+        predictions = await self._predict(config)
+        for cache_key in (key, *aliases):
+            set_cached(cache_key, predictions, ttl_seconds)
+        return predictions
+
+    async def stream_predict(self, config: Dict) -> AsyncIterator[ModelPrediction]:
+        """
+        Yield model predictions for a configuration as they complete.
+
+        Failed models, including ones whose own client timed out, are logged
+        and skipped. Raises ModelTimeoutError once the ensemble timeout
+        elapses; models still running when the stream is closed are cancelled.
+        """
+        tasks = [
+            asyncio.create_task(batcher.submit(config))
+            for batcher in self._batchers
+        ]
         
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        pending = set(tasks)
         try:
-            # Run predictions with timeout
-            tasks = [
-                asyncio.create_task(model.predict(config))
-                for model in self.models
-            ]
-            
-            done, pending = await asyncio.wait(
-                tasks,
-                timeout=self.timeout,
-                return_when=asyncio.ALL_COMPLETED
-            )
-            
-            # Cancel any pending tasks
+            while pending:
+                remaining = deadline - loop.time()
+                done = set()
+                if remaining > 0:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=remaining,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                if not done:
+                    raise ModelTimeoutError(
+                        f"Prediction timed out after {self.timeout}s"
+                    )
+                
+                for task in done:
+                    try:
+                        pred = task.result()
+                    except Exception as e:
+                        logger.error(f"Model prediction failed: {str(e)}")
+                        continue
+                    yield pred
+        finally:
+            # Cancel any pending tasks and reap them in one pass
+            pending = [task for task in tasks if not task.done()]
             for task in pending:
                 task.cancel()
-            
-            # Handle results
-            predictions = []
-            for task in done:
-                try:
-                    pred = await task
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    @cache_result(ttl_seconds=3600)
+    async def predict(self, config: Dict) -> List[ModelPrediction]:
+        """
+        Generate predictions from all models in parallel.
+
+        Results are cached by configuration content; see ``_predict``.
+        """
+        return await self._predict(config)
+
+    async def _predict(self, config: Dict) -> List[ModelPrediction]:
+        """
+        Generate predictions from all models in parallel, bypassing the cache.
+
+        Returns as soon as a strict majority of the ensemble agrees on a
+        verdict; models still running at that point are cancelled, so the
+        result may hold fewer predictions than there are models. Cancelled
+        and failed models abstain rather than counting as dissent.
+        """
+        start_ns = time.perf_counter_ns()
+        quorum = len(self.models) // 2 + 1
+        predictions = []
+        verdict_counts = Counter()
+        
+        try:
+            async with aclosing(self.stream_predict(config)) as stream:
+                async for pred in stream:
                     predictions.append(pred)
-                except Exception as e:
-                    logger.error(f"Model prediction failed: {str(e)}")
-            
+                    verdict_counts[pred.verdict] += 1
+                    if verdict_counts[pred.verdict] >= quorum:
+                        # Remaining models cannot overturn a strict majority
+                        break
+        except ModelTimeoutError:
             if not predictions:
-                raise ModelError("All models failed to generate predictions")
-            
-            self.last_latency = int((time.time() - start_time) * 1000)
-            return predictions
-            
-        except asyncio.TimeoutError:
-            raise ModelTimeoutError(f"Prediction timed out after {self.timeout}s")
+                raise
+            logger.warning(
+                f"Ensemble timed out after {self.timeout}s with "
+                f"{len(predictions)}/{len(self.models)} predictions"
+            )
         except Exception as e:
             logger.error(f"Ensemble prediction failed: {str(e)}")
-            raise ModelError(str(e))
\ No newline at end of file
+            raise ModelError(str(e))
+        
+        if not predictions:
+            raise ModelError("All models failed to generate predictions")
+        
+        self.last_latency = (time.perf_counter_ns() - start_ns) // 1_000_000
+        return predictions
+
+    async def predict_many(self, configs: Iterable[Dict],
+                           max_in_flight: int = 32
+                           ) -> AsyncIterator[Union[List[ModelPrediction], Exception]]:
+        """
+        Yield ensemble predictions for a sequence of configurations, in order.
+
+        Up to ``max_in_flight`` configurations are predicted concurrently, so
+        a lazy ``configs`` iterable (e.g. one parsing YAML documents on
+        demand) prepares the next input while earlier ones are in flight.
+        A configuration whose prediction fails yields its exception in place
+        of the predictions, without affecting the others.
+        """
+        in_flight = deque()
+        try:
+            for config in configs:
+                in_flight.append(asyncio.create_task(self.predict(config)))
+                # Let the new task dispatch before producing the next config
+                await asyncio.sleep(0)
+                if len(in_flight) >= max_in_flight:
+                    yield await _settle(in_flight.popleft())
+            while in_flight:
+                yield await _settle(in_flight.popleft())
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    @cache_result(ttl_seconds=86400)
+    async def generate_remediation(self, violations: Sequence[str]) -> List[str]:
+        """
+        Generate remediation steps for violations from all models.
+
+        Results are cached for a day since the same violation sets recur
+        across configurations.
+        """
+        if not violations:
+            return []
+        
+        violations = list(violations)
+        results = await asyncio.gather(
+            *(model.generate_remediation(violations) for model in self.models),
+            return_exceptions=True
+        )
+        
+        steps = {}
+        failures = 0
+        for model_steps in results:
+            if isinstance(model_steps, Exception):
+                logger.error(f"Model remediation failed: {str(model_steps)}")
+                failures += 1
+                continue
+            steps.update(dict.fromkeys(model_steps))
+        
+        if failures == len(results):
+            raise ModelError("All models failed to generate remediation")
+        
+        return list(steps)
@@ -6,7 +6,7 @@ from typing import Dict, List
 class SecurityValidator:
     def __init__(self, config_path: str):
         with open(config_path) as f:
-            self.config = yaml.safe_load(f)
+            self.config = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
         
     def validate_config(self, test_case: str) -> Dict:
         """
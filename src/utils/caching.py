@@ -1,42 +1,163 @@
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional
+import asyncio
+import heapq
 import time
 import functools
 import hashlib
+import inspect
 import json
 import logging
-from dataclasses import asdict
+
+# Keys are 128-bit: cache hits are trusted without comparing arguments, so
+# a collision would silently return another input's predictions
+try:
+    import xxhash
+    _new_hasher = xxhash.xxh3_128
+except ImportError:
+    def _new_hasher(data: bytes = b""):
+        return hashlib.blake2b(data, digest_size=16)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 class Cache:
-    """Simple in-memory cache with TTL."""
+    """
+    Simple in-memory cache with TTL.
+
+    Expiry times are kept in a min-heap so every access can evict all
+    expired entries, whatever their TTL, instead of leaving them in place
+    until their key is read. Overwritten keys leave stale heap entries that
+    are skipped when popped.
+    """
     def __init__(self):
         self._cache: Dict[str, tuple[Any, float]] = {}
+        self._expiries: List[tuple[float, str]] = []
+    
+    def _evict_expired(self, now: float):
+        """Drop every entry whose expiry has passed."""
+        while self._expiries and self._expiries[0][0] < now:
+            expiry, key = heapq.heappop(self._expiries)
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] == expiry:
+                del self._cache[key]
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired."""
-        if key not in self._cache:
-            return None
+        self._evict_expired(time.monotonic())
         
-        value, expiry = self._cache[key]
-        if time.time() > expiry:
-            del self._cache[key]
+        entry = self._cache.get(key)
+        if entry is None:
             return None
-            
-        return value
+        
+        return entry[0]
     
     def set(self, key: str, value: Any, ttl_seconds: int):
         """Set value in cache with expiry."""
-        expiry = time.time() + ttl_seconds
+        now = time.monotonic()
+        expiry = now + ttl_seconds
         self._cache[key] = (value, expiry)
+        heapq.heappush(self._expiries, (expiry, key))
+        self._evict_expired(now)
+        
+        # Rebuild the heap when stale entries from overwrites dominate it
+        if len(self._expiries) > 2 * len(self._cache) + 64:
+            self._expiries = [(exp, k) for k, (_, exp) in self._cache.items()]
+            heapq.heapify(self._expiries)
     
     def clear(self):
         """Clear all cached values."""
         self._cache.clear()
+        self._expiries.clear()
 
 # Global cache instance
 _cache = Cache()
 
+def get_cached(key: str) -> Optional[Any]:
+    """Look up a value stored in the global cache under ``key``."""
+    return _cache.get(key)
+
+def set_cached(key: str, value: Any, ttl_seconds: int = 3600):
+    """Store a value in the global cache under ``key``."""
+    _cache.set(key, value, ttl_seconds)
+
+def clear_cache():
+    """Drop every entry from the global cache."""
+    _cache.clear()
+
+def _feed_canonical(hasher: Any, obj: Any, key_path: tuple,
+                    ignore: FrozenSet[tuple]):
+    """
+    Feed a type-tagged, length-prefixed encoding of ``obj`` into ``hasher``.
+    
+    Every container and scalar carries its type, so e.g. ``{}`` and the
+    string ``"{}"`` or a list and a dict with integer keys never collide.
+    """
+    if isinstance(obj, dict):
+        items = [(k, v) for k, v in obj.items() if key_path + (k,) not in ignore]
+        hasher.update(b"d%d:" % len(items))
+        for k, v in sorted(items, key=lambda item: repr(item[0])):
+            _feed_canonical(hasher, k, (), frozenset())
+            _feed_canonical(hasher, v, key_path + (k,), ignore)
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(b"%s%d:" % (b"l" if isinstance(obj, list) else b"t", len(obj)))
+        for item in obj:
+            _feed_canonical(hasher, item, key_path, ignore)
+    elif isinstance(obj, (set, frozenset)):
+        hasher.update(b"s%d:" % len(obj))
+        for item in sorted(obj, key=repr):
+            _feed_canonical(hasher, item, key_path, ignore)
+    else:
+        token = f"{type(obj).__qualname__}:{obj!r}".encode()
+        hasher.update(b"v%d:" % len(token))
+        hasher.update(token)
+
+def canonical_hash(obj: Any, ignore: FrozenSet[tuple] = frozenset()) -> str:
+    """
+    Hash a parsed document by content rather than by its serialized form.
+    
+    Mapping order and formatting do not affect the result. Paths in
+    ``ignore`` are key tuples from the root (list positions are not part of
+    the path) and are left out of the hash along with everything below them.
+    """
+    hasher = _new_hasher()
+    _feed_canonical(hasher, obj, (), ignore)
+    return hasher.hexdigest()
+
+def _dumps(obj: Any) -> bytes:
+    """
+    Serialize ``obj`` to sorted-key JSON bytes, using repr() for unknown types.
+    
+    orjson is used when installed; values it rejects (e.g. integers wider
+    than 64 bits) fall back to the stdlib encoder.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj, default=repr,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, sort_keys=True, default=repr).encode()
+
+def _make_key(name: str, args: tuple, kwargs: Dict) -> Optional[str]:
+    """
+    Hash a call signature into a cache key, or None if it cannot be keyed.
+    
+    Keys depend only on argument content, never on object identity or dict
+    insertion order. The arguments are serialized in one pass by a C/Rust
+    JSON encoder and hashed once, which keeps keying cheap on cache hits.
+    """
+    try:
+        return _new_hasher(_dumps([name, args, kwargs])).hexdigest()
+    except Exception as e:
+        logger.warning(f"Could not build cache key for {name}: {str(e)}")
+        return None
+
 def cache_result(ttl_seconds: int = 3600):
     """
     Decorator to cache function results.
@@ -45,36 +166,145 @@ def cache_result(ttl_seconds: int = 3600):
         ttl_seconds: Time-to-live in seconds for cached results
     """
     def decorator(func: Callable):
+        params = list(inspect.signature(func).parameters)
+        is_method = bool(params) and params[0] == "self"
+
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            # Create cache key from function args
-            key_dict = {
-                'func': func.__name__,
-                'args': [str(arg) for arg in args],
-                'kwargs': {k: str(v) for k, v in kwargs.items()}
-            }
-            key = hashlib.sha256(
-                json.dumps(key_dict, sort_keys=True).encode()
-            ).hexdigest()
+            # Create cache key from function args; the bound instance is
+            # keyed by identity rather than serialized with the arguments
+            key_args = (id(args[0]),) + args[1:] if is_method and args else args
+            key = _make_key(func.__qualname__, key_args, kwargs)
+            if key is None:
+                return await func(*args, **kwargs)
             
             # Check cache
             cached = _cache.get(key)
             if cached is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Cache hit for {func.__name__}")
                 return cached
             
             # Call function and cache result
             result = await func(*args, **kwargs)
             
-            # Handle dataclass results
-            if hasattr(result, '__dataclass_fields__'):
-                cache_value = asdict(result)
-            else:
-                cache_value = result
-                
-            _cache.set(key, cache_value, ttl_seconds)
-            logger.debug(f"Cached result for {func.__name__}")
+            # Results are cached as-is so hits return the same type as misses;
+            # dataclass results should be frozen to keep shared entries intact
+            _cache.set(key, result, ttl_seconds)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Cached result for {func.__name__}")
             
             return result
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+class AsyncBatcher:
+    """
+    Coalesces concurrent calls into batched calls of an async function.
+    
+    Items submitted within ``max_wait_ms`` of each other (up to ``max_batch``
+    items) are handed to ``batch_fn`` together; each caller receives the
+    result at its own position in the returned list.
+    """
+    def __init__(self, batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch: int = 32, max_wait_ms: int = 20):
+        self._batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: set = set()
+    
+    async def submit(self, item: Any) -> Any:
+        """Queue an item for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+    
+    async def _run(self):
+        """Collect queued items into batches and dispatch them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Dispatch without blocking collection of the next batch
+            task = loop.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+    
+    async def _dispatch(self, batch: List[tuple]):
+        """Run one batch and resolve each caller's future."""
+        # Skip callers that gave up while waiting for the batch
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+        
+        call = asyncio.ensure_future(self._batch_fn([item for item, _ in batch]))
+        
+        def abandon_if_unwanted(_):
+            # Stop the model call once no caller is waiting on it
+            if all(future.done() for _, future in batch):
+                call.cancel()
+        
+        for _, future in batch:
+            future.add_done_callback(abandon_if_unwanted)
+        
+        try:
+            results = await call
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Batched call failed: {str(e)}")
+            results = [e] * len(batch)
+        
+        if len(results) != len(batch):
+            # Results cannot be matched to callers, so fail the whole batch
+            error = ValueError(
+                f"Batch function returned {len(results)} results for "
+                f"{len(batch)} items"
+            )
+            logger.error(str(error))
+            results = [error] * len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    async def close(self):
+        """Stop the worker, cancel running batches and fail queued items."""
+        tasks = [task for task in (self._worker, *self._in_flight) if task is not None]
+        for task in tasks:
+            task.cancel()
+        if self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+        
+        self._worker = None
+        self._queue = None
+        self._loop = None
@@ -1,10 +1,16 @@
 from typing import List, Dict, Tuple, Optional
+from collections import Counter
 import numpy as np
 from dataclasses import dataclass
 from enum import Enum, auto
 import time
 import logging
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 logger = logging.getLogger(__name__)
 
 class ValidationVerdict(Enum):
@@ -13,6 +19,15 @@ class ValidationVerdict(Enum):
     INSECURE = auto()
     UNKNOWN = auto()
 
+# Verdict lookup by name; members map to themselves so either form resolves
+_VERDICT_BY_NAME = {
+    **{v.name: v for v in ValidationVerdict},
+    **{v: v for v in ValidationVerdict},
+}
+
+# Ensembles up to this size skip NumPy in calculate_confidence
+_SMALL_ENSEMBLE_SIZE = 5
+
 @dataclass
 class MetricsResult:
     """Container for validation metrics."""
@@ -33,29 +48,43 @@ class MetricsResult:
             raise ValueError(f"Model agreement must be between 0 and 1")
 
 def calculate_confidence(predictions: List[Dict]) -> Tuple[ValidationVerdict, float]:
-    """Calculate ensemble verdict and confidence."""
+    """
+    Calculate ensemble verdict and confidence.
+    
+    Agreement is measured over the predictions given; models that were
+    cancelled after an early majority or failed count as abstaining.
+    """
     if not predictions:
         raise ValueError("No predictions provided")
     
     try:
         # Get verdicts and confidences
-        verdicts = [ValidationVerdict[p.verdict] for p in predictions]
-        confidences = np.array([float(p.confidence) for p in predictions])
+        n = len(predictions)
+        verdicts = [
+            _VERDICT_BY_NAME.get(p.verdict, ValidationVerdict.UNKNOWN)
+            for p in predictions
+        ]
         
-        # Validate confidence values
-        if not np.all((0 <= confidences) & (confidences <= 1)):
-            raise ValueError("Confidence values must be between 0 and 1")
+        # Validate confidence values; NumPy only pays off for larger ensembles
+        if n <= _SMALL_ENSEMBLE_SIZE:
+            confidences = [float(p.confidence) for p in predictions]
+            if not all(0 <= c <= 1 for c in confidences):
+                raise ValueError("Confidence values must be between 0 and 1")
+            mean_confidence = sum(confidences) / n
+        else:
+            confidences = np.fromiter(
+                (float(p.confidence) for p in predictions), dtype=np.float64, count=n
+            )
+            if not np.all((0 <= confidences) & (confidences <= 1)):
+                raise ValueError("Confidence values must be between 0 and 1")
+            mean_confidence = float(np.mean(confidences))
         
         # Calculate majority verdict
-        verdict_counts = {}
-        for v in verdicts:
-            verdict_counts[v] = verdict_counts.get(v, 0) + 1
-        
-        majority_verdict = max(verdict_counts.items(), key=lambda x: x[1])[0]
+        majority_verdict, majority_count = Counter(verdicts).most_common(1)[0]
         
         # Calculate agreement-weighted confidence
-        agreement = verdict_counts[majority_verdict] / len(verdicts)
-        confidence = float(np.mean(confidences) * agreement)
+        agreement = majority_count / n
+        confidence = float(mean_confidence * agreement)
         
         return majority_verdict, confidence
         
@@ -75,21 +104,20 @@ def calculate_metrics(results: List[Dict], ground_truth: Dict) -> MetricsResult:
         MetricsResult with computed metrics
     """
     # Calculate basic metrics
-    tp = fp = fn = 0
-    latencies = []
+    n = len(results)
+    preds = np.fromiter(
+        (r["verdict"] == "INSECURE" for r in results), dtype=bool, count=n
+    )
+    truths = np.fromiter(
+        (ground_truth[r["id"]] == "INSECURE" for r in results), dtype=bool, count=n
+    )
+    latencies = np.fromiter(
+        (r["latency_ms"] for r in results), dtype=np.float64, count=n
+    )
     
-    for result in results:
-        pred = result["verdict"] == "INSECURE"
-        true = ground_truth[result["id"]] == "INSECURE"
-        
-        if pred and true:
-            tp += 1
-        elif pred and not true:
-            fp += 1
-        elif not pred and true:
-            fn += 1
-            
-        latencies.append(result["latency_ms"])
+    tp = int((preds & truths).sum())
+    fp = int((preds & ~truths).sum())
+    fn = int((~preds & truths).sum())
     
     # Calculate F1, precision, recall
     precision = tp / (tp + fp) if (tp + fp) > 0 else 0
@@ -116,26 +144,55 @@ def calculate_metrics(results: List[Dict], ground_truth: Dict) -> MetricsResult:
         sample_count=len(results)
     )
 
+def _ece_kernel(bin_indices, conf, correct, bins):
+    """Fused per-bin sums and ECE reduction in a single sweep."""
+    counts = np.zeros(bins, np.int64)
+    conf_sums = np.zeros(bins)
+    acc_sums = np.zeros(bins)
+    for i in range(conf.shape[0]):
+        b = bin_indices[i]
+        counts[b] += 1
+        conf_sums[b] += conf[i]
+        acc_sums[b] += correct[i]
+    
+    ece = 0.0
+    n = conf.shape[0]
+    for b in range(bins):
+        if counts[b]:
+            ece += counts[b] / n * abs(conf_sums[b] / counts[b] - acc_sums[b] / counts[b])
+    return ece
+
+if njit is not None:
+    # Sequential on purpose: parallel=True aborts when called from threads
+    # that numba's workqueue layer does not own (e.g. a ThreadPoolExecutor)
+    _ece_kernel = njit(cache=True, fastmath=True)(_ece_kernel)
+
+# Result counts from which the single-pass JIT kernel beats bincount; the
+# pure-Python kernel never does, so without numba it is never used
+_ECE_JIT_MIN_RESULTS = 100_000 if njit is not None else float("inf")
+
 def calculate_ece(results: List[Dict], ground_truth: Dict, bins: int = 10) -> float:
     """Calculate Expected Calibration Error."""
-    confidences = np.array([r["confidence"] for r in results])
+    confidences = np.array([r["confidence"] for r in results], dtype=np.float64)
     correct = np.array([
         r["verdict"] == ground_truth[r["id"]] for r in results
-    ])
+    ], dtype=np.float64)
     
+    # One binning rule for both paths so the ECE does not depend on batch size
     bin_boundaries = np.linspace(0, 1, bins + 1)
-    bin_indices = np.digitize(confidences, bin_boundaries) - 1
+    bin_indices = np.clip(np.digitize(confidences, bin_boundaries) - 1, 0, bins - 1)
     
-    ece = 0.0
-    for bin_idx in range(bins):
-        bin_mask = bin_indices == bin_idx
-        if not any(bin_mask):
-            continue
-            
-        bin_conf = confidences[bin_mask].mean()
-        bin_acc = correct[bin_mask].mean()
-        bin_size = bin_mask.sum()
-        
-        ece += (bin_size / len(results)) * abs(bin_conf - bin_acc)
+    if len(results) >= _ECE_JIT_MIN_RESULTS:
+        return float(_ece_kernel(bin_indices, confidences, correct, bins))
+    
+    # Per-bin sizes and sums in one pass each, instead of masking per bin
+    bin_sizes = np.bincount(bin_indices, minlength=bins)
+    bin_conf_sums = np.bincount(bin_indices, weights=confidences, minlength=bins)
+    bin_acc_sums = np.bincount(bin_indices, weights=correct, minlength=bins)
+    
+    occupied = bin_sizes > 0
+    sizes = bin_sizes[occupied]
+    gaps = np.abs(bin_conf_sums[occupied] / sizes - bin_acc_sums[occupied] / sizes)
+    ece = gaps @ (sizes / len(results))
     
-    return float(ece)
\ No newline at end of file
+    return float(ece)
@@ -0,0 +1,229 @@
+import asyncio
+import pytest
+from src.utils import caching
+from src.utils.caching import AsyncBatcher, Cache, canonical_hash
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable stand-in for time.monotonic."""
+    now = [1000.0]
+    monkeypatch.setattr(caching.time, "monotonic", lambda: now[0])
+    return now
+
+def test_cache_returns_value_before_expiry(clock):
+    """Test that entries are served until their TTL elapses."""
+    cache = Cache()
+    cache.set("key", "value", ttl_seconds=10)
+    clock[0] += 9
+    assert cache.get("key") == "value"
+    clock[0] += 2
+    assert cache.get("key") is None
+
+def test_cache_evicts_expired_entries_behind_long_lived_one(clock):
+    """Test that a long TTL at the front does not block eviction of later entries."""
+    cache = Cache()
+    cache.set("long", "kept", ttl_seconds=86400)
+    for i in range(5):
+        cache.set(f"short-{i}", i, ttl_seconds=0)
+    clock[0] += 1
+    assert cache.get("long") == "kept"
+    assert list(cache._cache) == ["long"]
+
+def test_cache_overwrite_uses_latest_ttl(clock):
+    """Test that overwriting a key replaces its expiry."""
+    cache = Cache()
+    cache.set("key", "old", ttl_seconds=1)
+    cache.set("key", "new", ttl_seconds=100)
+    clock[0] += 5
+    assert cache.get("key") == "new"
+
+def test_cache_heap_stays_bounded_under_overwrites(clock):
+    """Test that repeated overwrites of one key do not grow the expiry heap."""
+    cache = Cache()
+    for i in range(1000):
+        cache.set("key", i, ttl_seconds=3600)
+    assert len(cache._expiries) <= 2 * len(cache._cache) + 64
+    assert cache.get("key") == 999
+
+def test_batcher_coalesces_concurrent_submits():
+    """Test that items submitted together reach the batch function in one call."""
+    calls = []
+
+    async def batch_fn(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = AsyncBatcher(batch_fn, max_batch=8, max_wait_ms=10)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+def test_batcher_cancels_call_when_all_callers_cancel():
+    """Test that a hung batch call is cancelled once nobody waits for it."""
+    async def run():
+        started = asyncio.Event()
+        stopped = asyncio.Event()
+
+        async def batch_fn(items):
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            finally:
+                stopped.set()
+
+        batcher = AsyncBatcher(batch_fn, max_wait_ms=0)
+        caller = asyncio.create_task(batcher.submit("config"))
+        await started.wait()
+        caller.cancel()
+        await asyncio.wait_for(stopped.wait(), 1)
+        await asyncio.sleep(0)
+        in_flight = len(batcher._in_flight)
+        await batcher.close()
+        return in_flight
+
+    assert asyncio.run(run()) == 0
+
+def test_batcher_keeps_call_while_any_caller_waits():
+    """Test that cancelling one caller does not cancel a shared batch."""
+    async def run():
+        started = asyncio.Event()
+        release = asyncio.Event()
+        batches = []
+
+        async def batch_fn(items):
+            batches.append(list(items))
+            started.set()
+            await release.wait()
+            return list(items)
+
+        # A full batch dispatches at once, so the window never elapses
+        batcher = AsyncBatcher(batch_fn, max_batch=2, max_wait_ms=60_000)
+        first = asyncio.create_task(batcher.submit("a"))
+        second = asyncio.create_task(batcher.submit("b"))
+        await started.wait()
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        # Let the cancelled caller's done-callback run before releasing
+        await asyncio.sleep(0)
+        release.set()
+        result = await asyncio.wait_for(second, 1)
+        await batcher.close()
+        return batches, result
+
+    assert asyncio.run(run()) == ([["a", "b"]], "b")
+
+def test_batcher_fails_callers_on_result_count_mismatch():
+    """Test that a short result list fails callers instead of leaving them waiting."""
+    async def run():
+        async def batch_fn(items):
+            return items[:1]
+
+        batcher = AsyncBatcher(batch_fn, max_wait_ms=10)
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True), 1
+        )
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+def test_batcher_close_stops_worker():
+    """Test that close cancels the worker and running batches."""
+    async def run():
+        async def batch_fn(items):
+            await asyncio.sleep(60)
+
+        batcher = AsyncBatcher(batch_fn, max_wait_ms=0)
+        caller = asyncio.create_task(batcher.submit("config"))
+        await asyncio.sleep(0.01)
+        worker = batcher._worker
+        await batcher.close()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        return worker
+
+    assert asyncio.run(run()).done()
+
+def test_canonical_hash_ignores_key_order():
+    """Test that mapping order does not change the hash."""
+    first = {"kind": "Pod", "spec": {"a": 1, "b": [1, 2]}}
+    second = {"spec": {"b": [1, 2], "a": 1}, "kind": "Pod"}
+    assert canonical_hash(first) == canonical_hash(second)
+
+def test_canonical_hash_keeps_list_order():
+    """Test that list order still changes the hash."""
+    assert canonical_hash({"a": [1, 2]}) != canonical_hash({"a": [2, 1]})
+
+@pytest.mark.parametrize("first, second", [
+    ({"a": {}}, {"a": "{}"}),
+    ({"a": []}, {"a": "[]"}),
+    ({"a": {}}, {"a": []}),
+    ({"a": {0: "x"}}, {"a": ["x"]}),
+    ({"a": True}, {"a": 1}),
+    ({"a": None}, {"a": "None"}),
+    ({"a": ["b", "c"]}, {"a": ["b, c"]}),
+])
+def test_canonical_hash_distinguishes_types(first, second):
+    """Test that values differing only in type hash differently."""
+    assert canonical_hash(first) != canonical_hash(second)
+
+def test_canonical_hash_skips_ignored_paths():
+    """Test that ignored paths are left out, including everything below them."""
+    ignore = frozenset({("metadata", "uid"), ("status",)})
+    first = {"metadata": {"name": "web", "uid": "1"}, "status": {"phase": "Running"}}
+    second = {"metadata": {"name": "web", "uid": "2"}}
+    assert canonical_hash(first, ignore) == canonical_hash(second, ignore)
+
+def test_canonical_hash_ignore_is_rooted():
+    """Test that ignore paths only match from the document root."""
+    ignore = frozenset({("metadata", "uid")})
+    first = {"spec": {"metadata": {"uid": "1"}}}
+    second = {"spec": {"metadata": {"uid": "2"}}}
+    assert canonical_hash(first, ignore) != canonical_hash(second, ignore)
+
+def test_cache_key_depends_only_on_content():
+    """Test that equal arguments give equal keys regardless of object identity."""
+    shared = "".join(["priv", "ileged"])
+    same_object = [shared, shared]
+    equal_objects = [shared, "".join(["priv", "ileged"])]
+    assert caching._make_key("f", (same_object,), {}) == caching._make_key("f", (equal_objects,), {})
+    assert caching._make_key("f", ({"a": 1, "b": 2},), {}) == caching._make_key("f", ({"b": 2, "a": 1},), {})
+
+def test_cache_key_distinguishes_types():
+    """Test that arguments differing only in type get different keys."""
+    assert caching._make_key("f", ({"a": {}},), {}) != caching._make_key("f", ({"a": "{}"},), {})
+    assert caching._make_key("f", ({"a": True},), {}) != caching._make_key("f", ({"a": 1},), {})
+    assert caching._make_key("f", ({"a": None},), {}) != caching._make_key("f", ({"a": "None"},), {})
+
+def test_cache_key_handles_values_orjson_rejects():
+    """Test that integers wider than 64 bits are still keyed by content."""
+    assert caching._make_key("f", (2 ** 70,), {}) == caching._make_key("f", (2 ** 70,), {})
+    assert caching._make_key("f", (2 ** 70,), {}) != caching._make_key("f", (2 ** 71,), {})
+
+def test_cache_result_bypasses_cache_for_unkeyable_args():
+    """Test that arguments whose repr fails are computed instead of raising."""
+    class Unrepresentable:
+        def __repr__(self):
+            raise RuntimeError("no repr")
+
+    calls = []
+
+    @caching.cache_result(ttl_seconds=60)
+    async def compute(value):
+        calls.append(value)
+        return "result"
+
+    arg = Unrepresentable()
+    assert asyncio.run(compute(arg)) == "result"
+    assert asyncio.run(compute(arg)) == "result"
+    assert len(calls) == 2
+
+def test_cache_keys_are_128_bit():
+    """Test that cache keys carry a 128-bit digest."""
+    assert len(canonical_hash({"a": 1})) == 32
+    assert len(caching._make_key("f", ({"a": 1},), {})) == 32
@@ -0,0 +1,203 @@
+import asyncio
+import pytest
+from src.models.ensemble import BaseModel, LLMEnsemble, ModelPrediction, ModelRegistry
+from src.utils.caching import clear_cache as clear_global_cache
+from src.utils.exceptions import ModelError, ModelTimeoutError
+
+class ScriptedModel(BaseModel):
+    """
+    Model that answers with a fixed verdict after a fixed delay.
+
+    An optional ``gate`` event holds the answer back until it is set, and an
+    optional ``answered`` event is set once the model has answered.
+    """
+    def __init__(self, config):
+        self.verdict = config["verdict"]
+        self.delay = config.get("delay", 0)
+        self.fail_with = config.get("fail_with")
+        self.gate = config.get("gate")
+        self.answered = config.get("answered")
+        self.completed = 0
+        self.cancelled = 0
+
+    async def predict(self, config):
+        try:
+            await asyncio.sleep(self.delay)
+            if self.gate is not None:
+                await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail_with is not None:
+            raise self.fail_with
+        self.completed += 1
+        if self.answered is not None:
+            self.answered.set()
+        return ModelPrediction(self.verdict, 0.9, [], 1, {})
+
+    async def generate_remediation(self, violations):
+        return [f"fix {v}" for v in violations]
+
+MODEL_NAMES = ("scripted-a", "scripted-b", "scripted-c")
+for name in MODEL_NAMES:
+    ModelRegistry.register(name)(ScriptedModel)
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_global_cache()
+    yield
+    clear_global_cache()
+
+def make_ensemble(*model_configs, timeout_seconds=5):
+    """Build an ensemble of scripted models with no batching window."""
+    return LLMEnsemble({
+        "timeout_seconds": timeout_seconds,
+        "batch_max_wait_ms": 0,
+        "models": dict(zip(MODEL_NAMES, model_configs)),
+    })
+
+def test_predict_returns_once_majority_agrees():
+    """Test that a decisive majority does not wait for the slowest model."""
+    ensemble = make_ensemble(
+        {"verdict": "INSECURE", "delay": 0.01},
+        {"verdict": "INSECURE", "delay": 0.02},
+        {"verdict": "SECURE", "delay": 5},
+    )
+    predictions = asyncio.run(asyncio.wait_for(ensemble.predict({"id": 1}), 1))
+    assert [p.verdict for p in predictions] == ["INSECURE", "INSECURE"]
+    assert ensemble.models[2].completed == 0
+
+def test_predict_cancels_trailing_model_call():
+    """Test that the slow model's call is cancelled, not left running, after a majority."""
+    ensemble = make_ensemble(
+        {"verdict": "INSECURE", "delay": 0.01},
+        {"verdict": "INSECURE", "delay": 0.01},
+        {"verdict": "SECURE", "delay": 5},
+    )
+
+    async def run():
+        await ensemble.predict({"id": 6})
+        await asyncio.sleep(0.01)
+        in_flight = sum(len(b._in_flight) for b in ensemble._batchers)
+        await ensemble.close()
+        return in_flight
+
+    assert asyncio.run(run()) == 0
+    assert ensemble.models[2].cancelled == 1
+
+def test_predict_waits_for_tiebreaker():
+    """Test that split verdicts keep waiting for the remaining model."""
+    async def run():
+        first_answered = asyncio.Event()
+        second_answered = asyncio.Event()
+        gate = asyncio.Event()
+        ensemble = make_ensemble(
+            {"verdict": "INSECURE", "answered": first_answered},
+            {"verdict": "SECURE", "answered": second_answered},
+            {"verdict": "SECURE", "gate": gate},
+        )
+        task = asyncio.create_task(ensemble.predict({"id": 2}))
+        await first_answered.wait()
+        await second_answered.wait()
+        # Give predict every chance to (wrongly) return on the split
+        for _ in range(5):
+            await asyncio.sleep(0)
+        returned_early = task.done()
+        gate.set()
+        predictions = await asyncio.wait_for(task, 1)
+        await ensemble.close()
+        return returned_early, predictions
+
+    returned_early, predictions = asyncio.run(run())
+    assert not returned_early
+    assert len(predictions) == 3
+
+def test_model_client_timeout_counts_as_failed_model():
+    """Test that one model's own TimeoutError does not time out the ensemble."""
+    ensemble = make_ensemble(
+        {"verdict": "INSECURE", "fail_with": TimeoutError()},
+        {"verdict": "SECURE", "delay": 0.01},
+    )
+    predictions = asyncio.run(ensemble.predict({"id": 3}))
+    assert [p.verdict for p in predictions] == ["SECURE"]
+
+def test_ensemble_timeout_returns_partial_predictions():
+    """Test that predictions gathered before the deadline are kept."""
+    ensemble = make_ensemble(
+        {"verdict": "INSECURE", "delay": 0.01},
+        {"verdict": "SECURE", "delay": 5},
+        {"verdict": "SECURE", "delay": 5},
+        timeout_seconds=0.1,
+    )
+    predictions = asyncio.run(ensemble.predict({"id": 4}))
+    assert [p.verdict for p in predictions] == ["INSECURE"]
+
+def test_ensemble_timeout_without_predictions_raises():
+    """Test that hitting the deadline with no predictions raises ModelTimeoutError."""
+    ensemble = make_ensemble(
+        {"verdict": "INSECURE", "delay": 5},
+        timeout_seconds=0.05,
+    )
+    with pytest.raises(ModelTimeoutError):
+        asyncio.run(ensemble.predict({"id": 5}))
+
+def test_remediation_is_cached_per_violation_set(monkeypatch):
+    """Test that repeated violation sets reuse the cached remediation."""
+    ensemble = make_ensemble({"verdict": "INSECURE"}, {"verdict": "INSECURE"})
+    calls = []
+    original = ScriptedModel.generate_remediation
+
+    async def counting(self, violations):
+        calls.append(tuple(violations))
+        return await original(self, violations)
+
+    monkeypatch.setattr(ScriptedModel, "generate_remediation", counting)
+    first = asyncio.run(ensemble.generate_remediation(("privileged",)))
+    second = asyncio.run(ensemble.generate_remediation(("privileged",)))
+    assert first == second == ["fix privileged"]
+    assert len(calls) == 2
+
+def test_predict_many_yields_results_in_order():
+    """Test that pipelined predictions come back in input order."""
+    ensemble = make_ensemble({"verdict": "INSECURE", "delay": 0.01})
+
+    async def run():
+        configs = ({"id": 100 + i} for i in range(10))
+        results = [r async for r in ensemble.predict_many(configs, max_in_flight=3)]
+        await ensemble.close()
+        return results
+
+    results = asyncio.run(run())
+    assert len(results) == 10
+    assert all(r[0].verdict == "INSECURE" for r in results)
+
+def test_predict_many_isolates_failed_config(monkeypatch):
+    """Test that one failing configuration yields its error without cancelling the rest."""
+    ensemble = make_ensemble({"verdict": "INSECURE", "delay": 0.01})
+    original = ScriptedModel.predict
+
+    async def fail_on_marker(self, config):
+        if config.get("fail"):
+            raise RuntimeError("boom")
+        return await original(self, config)
+
+    async def run():
+        configs = [{"id": 200}, {"id": 201, "fail": True}, {"id": 202}]
+        results = [r async for r in ensemble.predict_many(configs)]
+        await ensemble.close()
+        return results
+
+    monkeypatch.setattr(ScriptedModel, "predict", fail_on_marker)
+    results = asyncio.run(run())
+    assert isinstance(results[1], ModelError)
+    assert isinstance(results[0], list) and isinstance(results[2], list)
+
+def test_predict_cached_stores_key_and_aliases():
+    """Test that predict_cached stores its result under the key and every alias."""
+    ensemble = make_ensemble({"verdict": "INSECURE"})
+    predictions = asyncio.run(
+        ensemble.predict_cached("raw", {"id": 300}, aliases=("semantic",))
+    )
+    assert ensemble.get_cached("raw") is predictions
+    assert ensemble.get_cached("semantic") is predictions
+    assert ensemble.models[0].completed == 1
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from src.models.ensemble import ModelPrediction
+from src.utils import metrics
+from src.utils.metrics import ValidationVerdict, calculate_confidence, calculate_ece, calculate_metrics
+
+def prediction(verdict, confidence=0.9):
+    return ModelPrediction(verdict, confidence, [], 1, {})
+
+def test_confidence_treats_missing_models_as_abstaining():
+    """Test that an early-returned unanimous majority keeps full agreement."""
+    predictions = [prediction("INSECURE"), prediction("INSECURE")]
+    verdict, confidence = calculate_confidence(predictions)
+    assert verdict == ValidationVerdict.INSECURE
+    assert confidence == pytest.approx(0.9)
+
+def test_confidence_scales_with_disagreement():
+    """Test that split verdicts lower confidence by the majority share."""
+    predictions = [prediction("SECURE"), prediction("SECURE"), prediction("INSECURE")]
+    verdict, confidence = calculate_confidence(predictions)
+    assert verdict == ValidationVerdict.SECURE
+    assert confidence == pytest.approx(0.9 * 2 / 3)
+
+def reference_ece(confidences, correct, bins=10):
+    """Per-bin loop the vectorized ECE must agree with."""
+    edges = np.linspace(0, 1, bins + 1)
+    indices = np.clip(np.digitize(confidences, edges) - 1, 0, bins - 1)
+    ece = 0.0
+    for b in range(bins):
+        mask = indices == b
+        if mask.any():
+            ece += mask.sum() / len(confidences) * abs(confidences[mask].mean() - correct[mask].mean())
+    return ece
+
+def make_results(confidences, correct):
+    results = [
+        {"id": i, "verdict": "INSECURE", "confidence": c, "latency_ms": 100,
+         "model_agreement": 1.0}
+        for i, c in enumerate(confidences)
+    ]
+    ground_truth = {i: "INSECURE" if ok else "SECURE" for i, ok in enumerate(correct)}
+    return results, ground_truth
+
+def test_ece_matches_per_bin_loop():
+    """Test the bincount ECE against a straightforward per-bin loop."""
+    rng = np.random.default_rng(0)
+    confidences = rng.random(500)
+    correct = rng.random(500) < confidences
+    results, ground_truth = make_results(confidences, correct)
+    assert calculate_ece(results, ground_truth) == pytest.approx(
+        reference_ece(confidences, correct.astype(float))
+    )
+
+def test_ece_counts_full_confidence_in_last_bin():
+    """Test that confidence 1.0 lands in the last bin rather than being dropped."""
+    results, ground_truth = make_results([1.0, 1.0], [True, False])
+    assert calculate_ece(results, ground_truth) == pytest.approx(0.5)
+
+def test_ece_is_zero_for_perfect_calibration():
+    """Test that fully confident, fully correct results have no calibration error."""
+    results, ground_truth = make_results([1.0] * 4, [True] * 4)
+    assert calculate_ece(results, ground_truth) == pytest.approx(0.0)
+
+def test_metrics_confusion_counts():
+    """Test precision and recall from the boolean-array confusion counts."""
+    results = [
+        {"id": i, "verdict": verdict, "confidence": 0.9, "latency_ms": 100,
+         "model_agreement": 1.0}
+        for i, verdict in enumerate(["INSECURE", "INSECURE", "SECURE", "SECURE"])
+    ]
+    ground_truth = {0: "INSECURE", 1: "SECURE", 2: "INSECURE", 3: "SECURE"}
+    metrics = calculate_metrics(results, ground_truth)
+    assert metrics.precision == pytest.approx(0.5)
+    assert metrics.recall == pytest.approx(0.5)
+    assert metrics.sample_count == 4
+
+def test_metrics_keeps_fractional_latencies():
+    """Test that float latencies are not truncated before the percentile."""
+    results = [
+        {"id": i, "verdict": "SECURE", "confidence": 0.9, "latency_ms": 10.75,
+         "model_agreement": 1.0}
+        for i in range(3)
+    ]
+    ground_truth = {i: "SECURE" for i in range(3)}
+    assert calculate_metrics(results, ground_truth).latency_p95 == pytest.approx(10.75)
+
+def test_ece_kernel_matches_bincount_path(monkeypatch):
+    """Test that the large-batch kernel and the bincount path give the same ECE."""
+    confidences = np.array([0.05, 0.3, 0.3, 0.6, 0.6, 0.7, 0.7, 0.95, 1.0])
+    correct = np.array([False, True, False, True, True, False, True, True, True])
+    results, ground_truth = make_results(confidences, correct)
+    bincount_ece = calculate_ece(results, ground_truth)
+    monkeypatch.setattr(metrics, "_ECE_JIT_MIN_RESULTS", 0)
+    assert calculate_ece(results, ground_truth) == pytest.approx(bincount_ece)
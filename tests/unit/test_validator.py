@@ -1,8 +1,44 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 from src.core.validator import SecurityValidator
+from src.models.ensemble import BaseModel, ModelPrediction, ModelRegistry
+from src.utils.caching import clear_cache
 from pathlib import Path
 import yaml
 
+class RuleModel(BaseModel):
+    """Model that flags privileged containers, optionally after a delay."""
+    def __init__(self, config):
+        self.delay = config.get("delay", 0)
+        self.calls = 0
+
+    async def predict(self, config):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        containers = config["spec"]["containers"]
+        if any(c.get("securityContext", {}).get("privileged") for c in containers):
+            return ModelPrediction("INSECURE", 0.9, ["Privileged container"], 1, {})
+        return ModelPrediction("SECURE", 0.9, [], 1, {})
+
+    async def generate_remediation(self, violations):
+        return ["Set privileged: false" for v in violations if "Privileged" in v]
+
+RULE_MODEL_NAMES = ("rule-a", "rule-b", "rule-c")
+for name in RULE_MODEL_NAMES:
+    ModelRegistry.register(name)(RuleModel)
+
+PRIVILEGED_POD = """
+apiVersion: v1
+kind: Pod
+spec:
+  containers:
+  - name: nginx
+    securityContext:
+      privileged: true
+"""
+
 @pytest.fixture
 def validator():
     config_path = Path(__file__).parent / "../../configs/models/config.yaml"
@@ -11,11 +47,14 @@ def validator():
 @pytest.fixture
 def test_cases():
     test_path = Path(__file__).parent / "../../test_cases/kubernetes"
-    cases = {}
-    for yaml_file in test_path.glob("*.yaml"):
-        with open(yaml_file) as f:
-            cases[yaml_file.stem] = yaml.safe_load(f)
-    return cases
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    def load_one(yaml_file):
+        return yaml_file.stem, yaml.load(yaml_file.read_bytes(), Loader=loader)
+
+    # Load files concurrently so disk reads overlap across a large corpus
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        return dict(pool.map(load_one, test_path.glob("*.yaml")))
 
 def test_privileged_container_detection(validator):
     """Test detection of privileged container security issue."""
@@ -126,4 +165,74 @@ def test_ensemble_agreement(validator):
     """
     result = validator.validate_config(yaml_content)
     assert "model_agreement" in result
-    assert 0 <= result["model_agreement"] <= 1.0
\ No newline at end of file
+    assert 0 <= result["model_agreement"] <= 1.0
+
+@pytest.fixture
+def scripted_validator(tmp_path):
+    clear_cache()
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "models": {
+            "timeout_seconds": 5,
+            "batch_max_wait_ms": 0,
+            "models": {name: {} for name in RULE_MODEL_NAMES},
+        },
+    }))
+    yield SecurityValidator(str(config_path))
+    clear_cache()
+
+def test_validate_config_async_with_scripted_models(scripted_validator):
+    """Test a full validation pass against an ensemble of scripted models."""
+    result = asyncio.run(scripted_validator.validate_config_async(PRIVILEGED_POD))
+    assert result.verdict.name == "INSECURE"
+    assert result.violations == ["Privileged container"]
+    assert result.remediation == ["Set privileged: false"]
+    assert result.model_agreement == 1.0
+    assert result.quorum_reached
+    assert all(isinstance(p, ModelPrediction) for p in result.raw_predictions)
+
+def test_semantic_cache_hit_stores_raw_text_key(scripted_validator, monkeypatch):
+    """Test that reformatted YAML hitting the semantic key is cached under its own text."""
+    reformatted = PRIVILEGED_POD.replace("kind: Pod", "kind: Pod  # reformatted")
+    asyncio.run(scripted_validator.validate_config_async(PRIVILEGED_POD))
+    asyncio.run(scripted_validator.validate_config_async(reformatted))
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("cached YAML text was parsed again")
+
+    monkeypatch.setattr("src.core.validator.yaml.load", fail_parse)
+    result = asyncio.run(scripted_validator.validate_config_async(reformatted))
+    assert result.violations == ["Privileged container"]
+    assert sum(model.calls for model in scripted_validator.ensemble.models) <= 3
+
+def test_results_do_not_share_cached_lists(scripted_validator):
+    """Test that mutating one result's lists leaves cached entries intact."""
+    first = asyncio.run(scripted_validator.validate_config_async(PRIVILEGED_POD))
+    first.raw_predictions.clear()
+    first.remediation.clear()
+    second = asyncio.run(scripted_validator.validate_config_async(PRIVILEGED_POD))
+    assert second.raw_predictions
+    assert second.remediation == ["Set privileged: false"]
+
+def test_unanimous_early_majority_clears_confidence_threshold(tmp_path):
+    """Test that models cancelled after a unanimous majority do not drag confidence down."""
+    clear_cache()
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "models": {
+            "timeout_seconds": 5,
+            "batch_max_wait_ms": 0,
+            "models": {"rule-a": {}, "rule-b": {}, "rule-c": {"delay": 5}},
+        },
+    }))
+    validator = SecurityValidator(str(config_path))
+    try:
+        result = asyncio.run(asyncio.wait_for(
+            validator.validate_config_async(PRIVILEGED_POD), 1
+        ))
+    finally:
+        clear_cache()
+    assert len(result.raw_predictions) == 2
+    assert result.model_agreement == 1.0
+    assert result.quorum_reached
+    assert result.confidence >= validator.confidence_threshold